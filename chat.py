@@ -1,11 +1,15 @@
 import ollama
+from model_routing import resolve_route, timed
 
 def ask_question(input: str) -> str:
-    # Ask a question
-    response = ollama.chat(
-        model="llama2",   # You can change to "llama2:13b", "llama2:70b", or other local models
-        messages=[
-            {"role": "user", "content": input + " /n Please answer in markdown format."}
-        ]
-    )
+    # Ask a question; the model comes from the "assistant" route (see model_routing)
+    route = resolve_route('assistant')
+    with timed(route['task'], route['model']):
+        response = ollama.chat(
+            model=route['model'],
+            messages=[
+                {"role": "user", "content": input + " /n Please answer in markdown format."}
+            ],
+            options=route['options']
+        )
     return response["message"]["content"]
@@ -5,12 +5,17 @@ import re
 import threading
 import time
 import os
+from model_routing import resolve_route, timed, latency_stats, collect_latency
 
 def create_class(class_name: str, progress_callback=None):
     """Generate a class. If progress_callback is provided it will be called with a dict:
-    { units_total, units_done, lessons_total, lessons_done, percent, elapsed_seconds, est_seconds_remaining }
+    { units_total, units_done, lessons_total, lessons_done, percent, elapsed_seconds, est_seconds_remaining, task_latency }
+    task_latency only covers the model calls made for this class.
     """
+    with collect_latency() as job_latency:
+        return _create_class(class_name, progress_callback, job_latency)
 
+def _create_class(class_name: str, progress_callback, job_latency):
     context = "Class name: " + class_name
 
     # Helper to safely extract a string name from model output (which may be a dict)
@@ -34,7 +39,7 @@ def create_class(class_name: str, progress_callback=None):
         return str(item)
 
     # Phase 1: get units and lessons names so we know total work
-    units_json = message_to_json(ask_json("Create a json file with an array containing the unit names for a college class called " + class_name + ". The format for the name of each unit should be \"Unit X: [Unit Name]\". The json file should be in the format {\"units\": [array of unit names]}. Please respond with only the json file and nothing else. Do not reply with a question."))
+    units_json = message_to_json(ask_json("Create a json file with an array containing the unit names for a college class called " + class_name + ". The format for the name of each unit should be \"Unit X: [Unit Name]\". The json file should be in the format {\"units\": [array of unit names]}. Please respond with only the json file and nothing else. Do not reply with a question.", task='syllabus'))
     # normalize to a list: accept either {"units": [...]} or a top-level array
     if isinstance(units_json, dict):
         units_list = units_json.get('units') or []
@@ -49,7 +54,7 @@ def create_class(class_name: str, progress_callback=None):
     for raw_unit in units_list:
         unit_name = _extract_name(raw_unit)
         # ask for lesson names for this unit
-        lessons_json = message_to_json(ask_json("Please create a json file with an array containing the lesson names for a college class unit called " + unit_name + ". The format for the name of each lesson should be Lesson X: [Lesson Name]. The json file should be in the format {\"lessons\": [array of lesson names]}. Please respond with only the json file and nothing else. Here is the context you have generated so far: " + context))
+        lessons_json = message_to_json(ask_json("Please create a json file with an array containing the lesson names for a college class unit called " + unit_name + ". The format for the name of each lesson should be Lesson X: [Lesson Name]. The json file should be in the format {\"lessons\": [array of lesson names]}. Please respond with only the json file and nothing else. Here is the context you have generated so far: " + context, task='syllabus'))
         if isinstance(lessons_json, dict):
             raw_lessons = lessons_json.get('lessons') or []
         elif isinstance(lessons_json, list):
@@ -88,7 +93,8 @@ def create_class(class_name: str, progress_callback=None):
             'lessons_done': lessons_done,
             'percent': percent,
             'elapsed_seconds': int(elapsed),
-            'est_seconds_remaining': est_remaining
+            'est_seconds_remaining': est_remaining,
+            'task_latency': latency_stats(job_latency)
         })
 
     # Phase 2: generate unit/lesson content
@@ -97,10 +103,10 @@ def create_class(class_name: str, progress_callback=None):
         units_done += 1
         _report()
         for lesson_name in lesson_names:
-            content = ask_question(input="Please create the content for a college class lesson called " + lesson_name + ". The content should be in markdown format and should include headings, subheadings, bullet points, and code snippets where appropriate. Please respond with only the markdown content and nothing else. Do not provide example or filler content. You are speaking directly to a student. Here is context you have generated so far: " + context)
+            content = ask_question(input="Please create the content for a college class lesson called " + lesson_name + ". The content should be in markdown format and should include headings, subheadings, bullet points, and code snippets where appropriate. Please respond with only the markdown content and nothing else. Do not provide example or filler content. You are speaking directly to a student. Here is context you have generated so far: " + context, task='content')
             context+= "\nUnit: " + unit_name + " Lesson: " + lesson_name + "\nContent: " + summarize(content)
             new_lesson = lesson(lesson_name, content)
-            practice_problems_response = ask_question(input="Please practice problems and their solutions for a college class lesson called " + lesson_name + " in a unit called " + unit_name + ". Start each question with Q: and each answer with A: ")
+            practice_problems_response = ask_question(input="Please practice problems and their solutions for a college class lesson called " + lesson_name + " in a unit called " + unit_name + ". Start each question with Q: and each answer with A: ", task='problems')
             practice_problems = parse_qa(practice_problems_response)
             for problem in practice_problems:
                 new_problem = practice_problem(problem[0], problem[1])
@@ -115,52 +121,63 @@ def create_class(class_name: str, progress_callback=None):
         _report()
     return output_class
 
-def ask_question(input: str, useMarkdown: bool = True, model_name: str = None) -> str:
-    """Ask a question to the model, optionally requesting markdown output."""
+def ask_question(input: str, useMarkdown: bool = True, model_name: str = None, task: str = None) -> str:
+    """Ask a question to the model, optionally requesting markdown output.
+    task selects the model/options from the routing table in model_routing."""
 
-    model = model_name or os.getenv('OLLAMA_MODEL', 'llama3')
+    route = resolve_route(task, model_name)
+    model = route['model']
     # System message should be a short role instruction; user holds the task
     system_msg = "You are an assistant that responds helpfully." if useMarkdown else "You are an assistant that responds helpfully."
     user_msg = input
     if useMarkdown:
         user_msg += "\n\nPlease answer in markdown format."
 
-    response = ollama.chat(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": user_msg}
-        ],
-        options={
-            # keep defaults low for deterministic output when needed; adjust at call-site
-            "temperature": 0.0,
-            "top_p": 0.0,
-            "top_k": 50,
-            "seed": random.randint(1, 1_000_000)
-        }
-    )
+    options = {
+        # keep defaults low for deterministic output when needed; adjust per task in the routing table
+        "temperature": 0.0,
+        "top_p": 0.0,
+        "top_k": 50,
+        "seed": random.randint(1, 1_000_000)
+    }
+    options.update(route['options'])
+    with timed(route['task'], model):
+        response = ollama.chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg}
+            ],
+            options=options
+        )
 
     return response["message"]["content"]
 
 
-def ask_json(prompt: str, model_name: str = None, max_attempts: int = 2) -> str:
-    """Ask the model to return JSON only. Retries once with an explicit repair instruction if parsing fails."""
-    model = model_name or os.getenv('OLLAMA_MODEL', 'llama3')
+def ask_json(prompt: str, model_name: str = None, max_attempts: int = 2, task: str = None) -> str:
+    """Ask the model to return JSON only. Retries once with an explicit repair instruction if parsing fails.
+    The first attempt runs on the caller's task route; retries are JSON repair and use the json-repair route."""
+    first_route = resolve_route(task, model_name)
+    repair_route = resolve_route('json-repair', model_name)
     system = "You are a strict JSON generator. Output only valid JSON and nothing else. If you cannot, output a single JSON object like {\"error\":\"explain why\"} and nothing else."
     user = prompt
     for attempt in range(max_attempts):
-        resp = ollama.chat(
-            model=model,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user}
-            ],
-            options={
-                "temperature": 0.0,
-                "top_p": 0.0,
-                "max_tokens": 1500,
-            }
-        )
+        route = first_route if attempt == 0 else repair_route
+        model = route['model']
+        options = {
+            "temperature": 0.0,
+            "top_p": 0.0,
+        }
+        options.update(route['options'])
+        with timed(route['task'], model):
+            resp = ollama.chat(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user}
+                ],
+                options=options
+            )
         text = resp["message"]["content"]
         # quick JSON detection
         if text.strip().startswith('{') or text.strip().startswith('['):
@@ -170,11 +187,11 @@ def ask_json(prompt: str, model_name: str = None, max_attempts: int = 2) -> str:
     return text
 
 def summarize(input: str) -> str:
-    return ask_question(input="Please provide a concise summary of the following text for context in future questions. Text: " + input + ". Your response should be a few sentences long.", useMarkdown=False)
+    return ask_question(input="Please provide a concise summary of the following text for context in future questions. Text: " + input + ". Your response should be a few sentences long.", useMarkdown=False, task='summary')
 
 
 def _revise_json_str(json_str: str, error: str) -> str:
-    revised = ask_question(input="You are a professional in JSON format. The following json file has an error: " + error + ". Please revise the json file to fix the error. The json file is: " + json_str + ". Your output json must be different than the last json file I provided you. If you are unsure how to fix the error, you may delete that element of the json. Before you output the json include the reasoning for your change after the marker \"-r\", this must be BEFORE the JSON file in your message. Here's a paragraph summarizing the rules of JSON: JSON (JavaScript Object Notation) represents data using objects and arrays. An object is a collection of key-value pairs enclosed in curly braces `{}`, where keys must be strings in double quotes and values can be a string, number, boolean, null, object, or array. Each key-value pair is separated by a comma. An array is an ordered list of values enclosed in square brackets `[]`, with elements separated by commas and values allowed to be any valid JSON type. Strings must use double quotes and can include escaped characters like `\"`, `\\`, `\n`, or `\t`. Numbers can be integers or decimals, may be negative, cannot have leading zeros (except zero itself), and can use scientific notation. Boolean values are `true` or `false`, and `null` represents the absence of a value. Whitespace outside strings is ignored, trailing commas are not allowed, and keys within an object must be unique.")
+    revised = ask_question(input="You are a professional in JSON format. The following json file has an error: " + error + ". Please revise the json file to fix the error. The json file is: " + json_str + ". Your output json must be different than the last json file I provided you. If you are unsure how to fix the error, you may delete that element of the json. Before you output the json include the reasoning for your change after the marker \"-r\", this must be BEFORE the JSON file in your message. Here's a paragraph summarizing the rules of JSON: JSON (JavaScript Object Notation) represents data using objects and arrays. An object is a collection of key-value pairs enclosed in curly braces `{}`, where keys must be strings in double quotes and values can be a string, number, boolean, null, object, or array. Each key-value pair is separated by a comma. An array is an ordered list of values enclosed in square brackets `[]`, with elements separated by commas and values allowed to be any valid JSON type. Strings must use double quotes and can include escaped characters like `\"`, `\\`, `\n`, or `\t`. Numbers can be integers or decimals, may be negative, cannot have leading zeros (except zero itself), and can use scientific notation. Boolean values are `true` or `false`, and `null` represents the absence of a value. Whitespace outside strings is ignored, trailing commas are not allowed, and keys within an object must be unique.", task='json-repair')
     # Extract JSON from response
     print("Revised JSON full output: \n", revised + "\n")
     reasoningstart = revised.find("-r")
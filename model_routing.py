@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Routing table: task type -> model, extra ollama options and token limit (num_predict).
+# A model of None falls back to OLLAMA_MODEL. Tasks marked "small" prefer OLLAMA_SMALL_MODEL
+# when it is set, so throwaway work (summaries, JSON repair) can run on a fast model.
+#
+# Per-deployment overrides, highest priority first:
+#   OLLAMA_MODEL_<TASK>   e.g. OLLAMA_MODEL_SUMMARY=llama3.2:1b, OLLAMA_MODEL_JSON_REPAIR=qwen2.5:0.5b
+#   OLLAMA_ROUTES         path to a JSON file shaped like MODEL_ROUTES (entries are merged per task)
+MODEL_ROUTES = {
+    'syllabus': {'model': None, 'small': False, 'options': {}, 'num_predict': 1500},
+    'content': {'model': None, 'small': False, 'options': {}, 'num_predict': None},
+    'summary': {'model': None, 'small': True, 'options': {}, 'num_predict': 256},
+    'problems': {'model': None, 'small': False, 'options': {}, 'num_predict': None},
+    'json-repair': {'model': None, 'small': True, 'options': {}, 'num_predict': 1500},
+    'assistant': {'model': None, 'small': False, 'options': {}, 'num_predict': None},
+}
+
+_routes_file_cache = {'path': None, 'mtime': None, 'routes': {}}
+_latency = {}
+_latency_lock = threading.Lock()
+# per-thread counters opened by collect_latency(), so a job can report only its own calls
+_local = threading.local()
+
+
+def _load_routes_file():
+    path = os.getenv('OLLAMA_ROUTES')
+    if not path:
+        return {}
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    cache = _routes_file_cache
+    if cache['path'] != path or cache['mtime'] != mtime:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            routes = data if isinstance(data, dict) else {}
+        except Exception as e:
+            print("Could not load OLLAMA_ROUTES file:", e)
+            routes = {}
+        cache.update(path=path, mtime=mtime, routes=routes)
+    return cache['routes']
+
+
+def resolve_route(task: str = None, model_name: str = None) -> dict:
+    """Return {'task', 'model', 'options'} for a task. An explicit model_name always wins."""
+    route = dict(MODEL_ROUTES.get(task) or {})
+    route['options'] = dict(route.get('options') or {})
+    override = _load_routes_file().get(task) if task else None
+    if isinstance(override, dict):
+        for k, v in override.items():
+            if k == 'options' and isinstance(v, dict):
+                route['options'].update(v)
+            else:
+                route[k] = v
+
+    env_key = 'OLLAMA_MODEL_' + task.upper().replace('-', '_') if task else None
+    model = (model_name
+             or (os.getenv(env_key) if env_key else None)
+             or route.get('model')
+             or (os.getenv('OLLAMA_SMALL_MODEL') if route.get('small') else None)
+             or os.getenv('OLLAMA_MODEL', 'llama3'))
+
+    options = route['options']
+    if route.get('num_predict'):
+        options.setdefault('num_predict', route['num_predict'])
+    return {'task': task or 'default', 'model': model, 'options': options}
+
+
+def _add_sample(table: dict, task: str, model: str, seconds: float):
+    entry = table.setdefault(task, {'model': model, 'calls': 0, 'total_seconds': 0.0, 'last_seconds': 0.0, 'max_seconds': 0.0})
+    entry['model'] = model
+    entry['calls'] += 1
+    entry['total_seconds'] += seconds
+    entry['last_seconds'] = seconds
+    entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+
+def record_latency(task: str, model: str, seconds: float):
+    with _latency_lock:
+        _add_sample(_latency, task, model, seconds)
+    counter = getattr(_local, 'counter', None)
+    if counter is not None:
+        _add_sample(counter, task, model, seconds)
+
+
+@contextmanager
+def collect_latency():
+    """Open a latency counter for calls made on this thread. Yields the counter; pass it to latency_stats()."""
+    previous = getattr(_local, 'counter', None)
+    counter = {}
+    _local.counter = counter
+    try:
+        yield counter
+    finally:
+        _local.counter = previous
+
+
+@contextmanager
+def timed(task: str, model: str):
+    """Time a model call and add it to the per-task latency stats."""
+    start = time.time()
+    try:
+        yield
+    finally:
+        record_latency(task, model, time.time() - start)
+
+
+def latency_stats(counter: dict = None) -> dict:
+    """Snapshot of per-task latency: model, calls, total/avg/last/max seconds.
+    Process-wide by default, or for a single counter from collect_latency()."""
+    with _latency_lock:
+        out = {}
+        for task, entry in (_latency if counter is None else counter).items():
+            stats = dict(entry)
+            stats['avg_seconds'] = round(entry['total_seconds'] / entry['calls'], 3) if entry['calls'] else 0.0
+            for k in ('total_seconds', 'last_seconds', 'max_seconds'):
+                stats[k] = round(stats[k], 3)
+            out[task] = stats
+    return out
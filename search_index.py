@@ -0,0 +1,340 @@
+import json
+import math
+import os
+import re
+import threading
+from markupsafe import Markup, escape
+
+# On-disk inverted index over every lesson in classes/. Each lesson is one document;
+# postings map term -> {doc_id: weighted term frequency}. The index is stored as one
+# shard per class under index/, so saving or deleting a class only rewrites its own
+# shard. Shards are merged in memory on first load, so queries never touch the class
+# files themselves. Lesson text for snippets lives in a <stem>.txt file next to each
+# shard and is read by byte offset, only for the results actually returned.
+CLASSES_DIR = 'classes'
+INDEX_DIR = 'index'
+INDEX_VERSION = 3
+
+# Matches in lesson names count more than matches in the body
+FIELD_WEIGHTS = {'lesson': 3, 'unit': 2, 'content': 1, 'problems': 1}
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+SNIPPET_RADIUS = 90
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is', 'it',
+    'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'were', 'will', 'with',
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+_MARKDOWN_RE = re.compile(r"```[a-z]*|[#*_`>|]+")
+
+
+def _stem(tok: str) -> str:
+    # Fold singular and plural onto one term. Both forms are normalised, so the stem does not
+    # have to be a real word: size/sizes -> siz, cache/caches -> cach, theory/theories -> theori.
+    if len(tok) > 4 and tok.endswith(('yses', 'theses')):
+        tok = tok[:-2] + 'is'                       # analyses -> analysis, hypotheses -> hypothesis
+    elif len(tok) > 4 and tok.endswith('izzes'):
+        tok = tok[:-3]                              # quizzes -> quiz
+    elif len(tok) > 3 and tok.endswith(('ses', 'xes', 'zes', 'ches', 'shes')):
+        tok = tok[:-2]                              # classes -> class, boxes -> box, sizes -> siz
+    elif len(tok) > 3 and tok.endswith('ies'):
+        tok = tok[:-3] + 'i'                        # theories -> theori, movies -> movi
+    elif len(tok) > 3 and tok.endswith('s') and not tok.endswith(('ss', 'us', 'is')):
+        tok = tok[:-1]                              # algorithms -> algorithm
+    # the matching singular forms
+    if len(tok) > 2 and tok.endswith(('se', 'xe', 'ze', 'che', 'she')):
+        tok = tok[:-1]                              # size -> siz, cache -> cach, database -> databas
+    elif len(tok) > 2 and tok.endswith('ie'):
+        tok = tok[:-1]                              # movie -> movi
+    elif len(tok) > 2 and tok.endswith('y'):
+        tok = tok[:-1] + 'i'                        # theory -> theori
+    return tok
+
+
+def tokenize(text: str) -> list:
+    """Lowercase, split on non-alphanumerics, drop stopwords and fold plurals with _stem.
+    Single characters are kept so languages like C and R stay searchable."""
+    out = []
+    for tok in _TOKEN_RE.findall((text or '').lower()):
+        if tok in STOPWORDS:
+            continue
+        out.append(_stem(tok))
+    return out
+
+
+def _plain_text(markdown_text: str) -> str:
+    # strip the markdown syntax that would otherwise clutter snippets
+    return ' '.join(_MARKDOWN_RE.sub(' ', markdown_text or '').split())
+
+
+def _lesson_docs(stem: str, data) -> list:
+    """Turn a saved class dict into a list of lesson documents."""
+    docs = []
+    units = data.get('units') if isinstance(data, dict) else None
+    for u_idx, unit in enumerate(units or []):
+        if not isinstance(unit, dict):
+            continue
+        unit_name = unit.get('unit_name') or ''
+        for l_idx, lesson in enumerate(unit.get('lessons') or []):
+            if not isinstance(lesson, dict):
+                continue
+            problems = ' '.join(
+                f"Q: {p.get('problem', '')} A: {p.get('solution', '')}"
+                for p in (lesson.get('practiceProblems') or []) if isinstance(p, dict)
+            )
+            docs.append({
+                'id': f"{u_idx}/{l_idx}",  # local to the shard; _merge prefixes the class
+                'class': stem,
+                'unit': unit_name,
+                'lesson': lesson.get('lesson_name') or '',
+                'content': _plain_text(lesson.get('content') or ''),
+                'problems': _plain_text(problems),
+            })
+    return docs
+
+
+class SearchIndex:
+    def __init__(self, classes_dir: str = CLASSES_DIR, index_dir: str = INDEX_DIR):
+        self.classes_dir = classes_dir
+        self.index_dir = index_dir
+        self.lock = threading.RLock()
+        self.shards = {}     # class stem -> {'mtime': float, 'docs': [doc ids], 'terms': [terms]}
+        self.docs = {}       # doc id -> {'class','unit','lesson','offset','size','length'}
+        self.postings = {}   # term -> {doc id: weighted tf}
+        self.total_length = 0
+
+    # ---- persistence ----
+
+    def _shard_path(self, stem: str) -> str:
+        return os.path.join(self.index_dir, f"{stem}.json")
+
+    def _text_path(self, stem: str) -> str:
+        return os.path.join(self.index_dir, f"{stem}.txt")
+
+    def load(self):
+        """Load all shards from disk, then reindex any class file that changed while we were not running."""
+        with self.lock:
+            if os.path.isdir(self.index_dir):
+                for f in os.listdir(self.index_dir):
+                    if not f.endswith('.json'):
+                        continue
+                    stem = os.path.splitext(f)[0]
+                    try:
+                        with open(os.path.join(self.index_dir, f), 'r', encoding='utf-8') as fh:
+                            shard = json.load(fh)
+                        if not isinstance(shard, dict) or shard.get('version') != INDEX_VERSION:
+                            continue
+                        if not os.path.exists(self._text_path(stem)):
+                            raise ValueError("missing text file")
+                        self._merge(stem, shard)
+                    except Exception as e:
+                        # skip the shard; sync() below sees the class as unindexed and rebuilds it
+                        print("Search index shard unreadable, will rebuild:", f, e)
+                        self._unmerge(stem)
+            self.sync()
+        return self
+
+    def _save_shard(self, stem: str, shard: dict, text: bytes):
+        os.makedirs(self.index_dir, exist_ok=True)
+        text_path = self._text_path(stem)
+        with open(text_path + '.tmp', 'wb') as f:
+            f.write(text)
+        os.replace(text_path + '.tmp', text_path)
+        shard_path = self._shard_path(stem)
+        with open(shard_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(dict(shard, version=INDEX_VERSION), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(shard_path + '.tmp', shard_path)
+
+    def _delete_shard(self, stem: str):
+        for path in (self._shard_path(stem), self._text_path(stem)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _read_text(self, doc: dict) -> str:
+        try:
+            with open(self._text_path(doc['class']), 'rb') as f:
+                f.seek(doc['offset'])
+                return f.read(doc['size']).decode('utf-8', errors='ignore')
+        except Exception:
+            return ''
+
+    def sync(self) -> bool:
+        """Bring the index in line with classes/ using file mtimes. Returns True if anything changed."""
+        with self.lock:
+            on_disk = {}
+            if os.path.isdir(self.classes_dir):
+                for f in os.listdir(self.classes_dir):
+                    if f.endswith('.json'):
+                        on_disk[os.path.splitext(f)[0]] = os.path.getmtime(os.path.join(self.classes_dir, f))
+            changed = False
+            for stem in list(self.shards):
+                if stem not in on_disk:
+                    self.remove_class(stem)
+                    changed = True
+            for stem, mtime in on_disk.items():
+                if (self.shards.get(stem) or {}).get('mtime') != mtime:
+                    self.update_class(stem)
+                    changed = True
+            return changed
+
+    # ---- incremental updates ----
+
+    def update_class(self, stem: str):
+        """(Re)index classes/<stem>.json and rewrite its shard. Does nothing if the shard is already current."""
+        path = os.path.join(self.classes_dir, f"{stem}.json")
+        try:
+            mtime = os.path.getmtime(path)
+            with self.lock:
+                if (self.shards.get(stem) or {}).get('mtime') == mtime:
+                    return
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print("Could not index class", stem, ":", e)
+            self.remove_class(stem)
+            return
+        shard = {'mtime': mtime, 'docs': {}, 'postings': {}}
+        text = bytearray()
+        for doc in _lesson_docs(stem, data):
+            tf = {}
+            length = 0
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(doc[field]):
+                    tf[term] = tf.get(term, 0) + weight
+                    length += 1
+            for term, count in tf.items():
+                shard['postings'].setdefault(term, {})[doc['id']] = count
+            doc_text = (doc['content'] + ' ' + doc['problems']).strip().encode('utf-8')
+            shard['docs'][doc['id']] = {
+                'class': doc['class'],
+                'unit': doc['unit'],
+                'lesson': doc['lesson'],
+                'offset': len(text),
+                'size': len(doc_text),
+                'length': length,
+            }
+            text += doc_text
+        with self.lock:
+            self._unmerge(stem)
+            self._merge(stem, shard)
+            self._save_shard(stem, shard, bytes(text))
+
+    def remove_class(self, stem: str):
+        """Drop every lesson of a class from the index and delete its shard."""
+        with self.lock:
+            self._unmerge(stem)
+            self._delete_shard(stem)
+
+    def _merge(self, stem: str, shard: dict):
+        # only ids and terms are kept per shard; the postings themselves live in self.postings.
+        # Raises on a malformed shard; callers undo the partial merge with _unmerge().
+        if not isinstance(shard.get('docs'), dict) or not isinstance(shard.get('postings'), dict):
+            raise ValueError("shard has no docs/postings")
+        # one shared global id string per doc, reused by every posting that mentions it
+        ids = {local: f"{stem}/{local}" for local in shard['docs']}
+        self.shards[stem] = {'mtime': shard['mtime'], 'docs': list(ids.values()), 'terms': list(shard['postings'])}
+        for local, doc in shard['docs'].items():
+            self.docs[ids[local]] = doc
+            self.total_length += doc['length']
+        for term, plist in shard['postings'].items():
+            merged = self.postings.setdefault(term, {})
+            for local, tf in plist.items():
+                merged[ids[local]] = tf
+
+    def _unmerge(self, stem: str):
+        shard = self.shards.pop(stem, None)
+        if not shard:
+            return
+        for doc_id in shard['docs']:
+            doc = self.docs.pop(doc_id, None)
+            if doc:
+                self.total_length -= doc.get('length', 0)
+        for term in shard['terms']:
+            merged = self.postings.get(term)
+            if merged is None:
+                continue
+            for doc_id in shard['docs']:
+                merged.pop(doc_id, None)
+            if not merged:
+                del self.postings[term]
+
+    # ---- querying ----
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """Return ranked results: [{class, unit, lesson, score, snippet}], best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self.lock:
+            n_docs = len(self.docs)
+            if n_docs == 0:
+                return []
+            avg_len = (self.total_length / n_docs) or 1
+            scores = {}
+            for term in terms:
+                plist = self.postings.get(term)
+                if not plist:
+                    continue
+                idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+                for doc_id, tf in plist.items():
+                    norm = K1 * (1 - B + B * self.docs[doc_id]['length'] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+            results = []
+            for doc_id, score in ranked:
+                doc = self.docs[doc_id]
+                results.append({
+                    'class': doc['class'],
+                    'unit': doc['unit'],
+                    'lesson': doc['lesson'],
+                    'score': round(score, 4),
+                    'snippet': make_snippet(self._read_text(doc), terms),
+                })
+        return results
+
+
+def make_snippet(text: str, terms: list) -> Markup:
+    """Escaped excerpt of text around the first query term hit, with hits wrapped in <mark>."""
+    if not text:
+        return Markup('')
+    # a word is a hit when it tokenizes to a query term, so plural forms match too
+    wanted = set(terms)
+
+    def hits(s):
+        return (w for w in _WORD_RE.finditer(s) if _stem(w.group(0).lower()) in wanted)
+
+    m = next(hits(text), None)
+    center = m.start() if m else 0
+    start = max(center - SNIPPET_RADIUS, 0)
+    end = min(center + SNIPPET_RADIUS, len(text))
+    excerpt = text[start:end]
+    out = Markup('')
+    pos = 0
+    for hit in hits(excerpt):
+        out += escape(excerpt[pos:hit.start()]) + Markup('<mark>') + escape(hit.group(0)) + Markup('</mark>')
+        pos = hit.end()
+    out += escape(excerpt[pos:])
+    if start > 0:
+        out = Markup('&hellip;') + out
+    if end < len(text):
+        out += Markup('&hellip;')
+    return out
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SearchIndex:
+    """Process-wide index, loaded (and synced with classes/) on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex().load()
+        return _index
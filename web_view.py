@@ -3,6 +3,7 @@ from markupsafe import Markup
 from chat import ask_question  # Import your function
 import markdown
 from class_creator import create_class as create_class_util
+from search_index import get_index
 import threading
 import uuid
 from concurrent.futures import ThreadPoolExecutor
@@ -53,6 +54,7 @@ def create_class():
                         return obj
                 with open(json_path, "w", encoding="utf-8") as f:
                     pyjson.dump(serialize(class_obj), f, ensure_ascii=False, indent=2)
+                _update_search_index(class_name)
             classes[class_name] = class_obj
             # Attempt to redirect to the first unit and lesson (U1 L1) if available
             try:
@@ -193,9 +195,21 @@ def save_class_json(class_obj, filename=None):
     path = os.path.join(classes_dir, filename)
     with open(path, 'w', encoding='utf-8') as f:
         pyjson.dump(_serialize(class_obj), f, ensure_ascii=False, indent=2)
+    _update_search_index(os.path.splitext(filename)[0])
     return filename
 
 
+def _update_search_index(class_name, removed=False):
+    # keep the search index in step with classes/; a failure here must not break saving/deleting
+    try:
+        if removed:
+            get_index().remove_class(class_name)
+        else:
+            get_index().update_class(class_name)
+    except Exception as e:
+        print("Search index update failed:", e)
+
+
 def _run_create_job(class_name, job_id):
     try:
         with jobs_lock:
@@ -302,6 +316,7 @@ def delete_class(class_name):
         # remove in-memory entry if present
         if class_name in classes:
             del classes[class_name]
+        _update_search_index(class_name, removed=True)
         return jsonify({'deleted': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -315,6 +330,26 @@ def jobs_list():
     return jsonify(out)
 
 
+@app.route('/model_stats', methods=['GET'])
+def model_stats():
+    from model_routing import latency_stats
+    # per-task model and latency (calls, total/avg/last/max seconds) since startup
+    return jsonify(latency_stats())
+
+
+@app.route('/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+    results = get_index().search(query, limit=limit) if query else []
+    if request.args.get('format') == 'json':
+        return jsonify([dict(r, snippet=str(r['snippet']), url=url_for('view_lesson', class_name=r['class'], unit_name=r['unit'], lesson_name=r['lesson'])) for r in results])
+    return render_template("search.html", query=query, results=results)
+
+
 @app.route('/classes_list', methods=['GET'])
 def classes_list():
     import os
@@ -348,6 +383,8 @@ def classes_list():
 
 
 if __name__ == "__main__":
+    # load/sync the search index in the background so the first query is fast
+    threading.Thread(target=get_index, daemon=True).start()
     app.run(debug=True)
 
 